@@ -13,18 +13,392 @@ Usage:
 
 import sourmash
 import requests
-import gzip
+import numpy as np
+import hashlib
 import os
 import json
 import sys
 import argparse
+import importlib.util
+import io
+import multiprocessing
+import queue
+import socket
+import socketserver
+import stat
+import threading
+from collections import deque
 from pathlib import Path
 
+try:
+    # ISA-L accelerated DEFLATE; drop-in replacement for gzip
+    from isal import igzip
+except ImportError:
+    import gzip as igzip
+
+try:
+    # Faster JSON serialization of the result
+    import orjson
+except ImportError:
+    orjson = None
+
+# Numba-compiled lookup kernels (kmer_kernels.py), imported by
+# _load_kernels only when the references are large enough to use them
+kmer_kernels = None
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+# Size of the blocks read from the (decompressed) FASTQ stream
+READ_CHUNK_SIZE = 1 << 20
+
+# Bytes of a local file the kernel is asked to start reading ahead
+READAHEAD_BYTES = 64 << 20
+
+# Distinct reads remembered for duplicate skipping before the set is reset
+DEDUP_WINDOW = 50000
+
+# Batches queued per worker process before more input is read
+TASKS_PER_WORKER = 2
+
+# Smallest reference set (in hashes) counted with the compiled kernels;
+# importing numba and loading the cached kernels costs about 0.3 s per run
+COMPILED_MIN_REF_HASHES = 1 << 20
+
+
+def _load_kernels():
+    """
+    Import kmer_kernels on first use.
+
+    Returns:
+        module or None: kmer_kernels, or None if numba is not installed
+    """
+    global kmer_kernels
+    if kmer_kernels is None and HAS_NUMBA:
+        try:
+            import kmer_kernels as kernels
+        except ImportError:
+            return None
+        kmer_kernels = kernels
+    return kmer_kernels
+
+
+def _iter_sequence_batches(f, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield batches of sequence lines from a binary FASTQ stream.
+
+    The stream is read in large blocks which are split on newlines in
+    bulk, instead of iterating the file one line at a time. Only line 2
+    of each 4-line record is kept; header, separator and quality lines
+    are never copied or stripped. As with line-by-line parsing, a
+    trailing incomplete record is not a read.
+
+    Args:
+        f: Binary file-like object positioned at the start of a record
+        chunk_size: Number of bytes to read per block
+
+    Yields:
+        list: Sequence lines (bytes) of the records completed by each block
+    """
+    remainder = b''
+    newline = None
+
+    while True:
+        buf = f.read(chunk_size)
+        if not buf:
+            break
+
+        data = remainder + buf
+
+        if newline is None:
+            # Split Windows-style files on CRLF so no per-line strip is needed
+            end = data.find(b'\n')
+            if end == -1:
+                remainder = data
+                continue
+            newline = b'\r\n' if data[end - 1:end] == b'\r' else b'\n'
+
+        lines = data.split(newline)
+        # Whole records only; the lines of an incomplete record (and the
+        # last, partial line) are carried over to the next block
+        complete = (len(lines) - 1) // 4 * 4
+        if complete:
+            yield lines[1:complete:4]
+        remainder = newline.join(lines[complete:])
+
+    if remainder and newline is not None:
+        # The final quality line may not end with a newline
+        lines = remainder.split(newline)
+        if len(lines) == 4 and lines[3]:
+            yield [lines[1]]
+
+
+def _print_json(obj, file=None):
+    """
+    Print an object as indented JSON.
+
+    Uses orjson when available, writing its bytes straight to the
+    underlying binary stream; falls back to the json module otherwise,
+    or when the stream has no binary buffer (e.g. io.StringIO).
+
+    Args:
+        obj: JSON-serializable object
+        file: Text stream to write to (default: sys.stdout)
+    """
+    file = file or sys.stdout
+
+    if orjson is None or not hasattr(file, 'buffer'):
+        print(json.dumps(obj, indent=2), file=file)
+        return
+
+    file.flush()
+    file.buffer.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    file.buffer.write(b'\n')
+    file.buffer.flush()
+
+
+def _json_line(obj):
+    """Serialize an object as a single line of compact JSON (bytes)."""
+    if orjson is None:
+        return json.dumps(obj).encode() + b'\n'
+    return orjson.dumps(obj) + b'\n'
+
+
+def _advise_sequential(fd):
+    """
+    Tell the kernel a file will be read sequentially from the start.
+
+    Enables aggressive read-ahead and starts fetching the first
+    READAHEAD_BYTES (not the whole file, which may be far larger than
+    the sampled reads need). A no-op where posix_fadvise is unavailable.
+
+    POSIX_FADV_SEQUENTIAL applies to the open file description, so it
+    is lost when fd is closed; call this on the descriptor the file is
+    actually read through. Only the WILLNEED prefetch, which fills the
+    shared page cache, outlives it.
+
+    Args:
+        fd: File descriptor of the (possibly compressed) file on disk,
+            kept open while the file is read
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, READAHEAD_BYTES, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+
+def _take_reads(batches, read_limit):
+    """Truncate a stream of sequence batches to read_limit reads."""
+    remaining = read_limit
+    for batch in batches:
+        if len(batch) >= remaining:
+            yield batch[:remaining]
+            return
+        yield batch
+        remaining -= len(batch)
+
+
+def _drop_seen(batch, seen, window=DEDUP_WINDOW):
+    """
+    Remove reads that have already been sketched from a batch.
+
+    The sketch is a set, so hashing a duplicate read adds nothing. seen
+    is updated in place and cleared once it holds window reads, which
+    bounds memory on large read limits.
+
+    Args:
+        batch: List of read sequences
+        seen: Set of reads already sketched
+        window: Maximum size of seen
+
+    Returns:
+        list: Reads in batch not present in seen (in arbitrary order)
+    """
+    if len(seen) >= window:
+        seen.clear()
+
+    fresh = set(batch)
+    fresh -= seen
+    seen |= fresh
+    return list(fresh)
+
+
+def _sorted_hashes(minhash):
+    """Return the hashes of a MinHash as a sorted uint64 array."""
+    hashes = np.fromiter(minhash.hashes, dtype=np.uint64, count=len(minhash))
+    hashes.sort()
+    return hashes
+
+
+def _table_counter(keys, masks, n_refs):
+    """
+    Build a shared-hash counter over a reference hash table.
+
+    Args:
+        keys: Table keys from kmer_kernels.build_table
+        masks: Table masks from kmer_kernels.build_table
+        n_refs: Number of references
+
+    Returns:
+        callable: count(sample_hashes) -> per-reference counts
+    """
+    table_counts = kmer_kernels.table_counts
+
+    def count(sample_hashes):
+        return table_counts(sample_hashes, keys, masks, n_refs)
+
+    return count
+
+
+def _index_counter(index, ids, n_refs, kernels=None):
+    """
+    Build a shared-hash counter over a sorted, merged reference index.
+
+    Args:
+        index: Sorted uint64 hashes of all references
+        ids: Reference position of each index entry
+        n_refs: Number of references
+        kernels: kmer_kernels, to merge with index_counts when that is
+            cheaper than binary search; None to always search
+
+    Returns:
+        callable: count(sample_hashes) -> per-reference counts
+    """
+    index_counts = kernels.index_counts if kernels is not None else None
+
+    def count(sample_hashes):
+        # A linear merge beats binary search (of the smaller side into
+        # the larger) once the two sides are of similar size
+        small, large = sorted((index.size, sample_hashes.size))
+        merge_cost = small + large
+        search_cost = small * np.log2(max(large, 2))
+        if index_counts is not None and merge_cost <= search_cost:
+            return index_counts(sample_hashes, index, ids, n_refs)
+
+        # Binary-search the smaller side into the larger one
+        if index.size < sample_hashes.size:
+            pos = np.searchsorted(sample_hashes, index)
+            pos = np.minimum(pos, sample_hashes.size - 1)
+            found = sample_hashes[pos] == index
+            return np.bincount(ids[found], minlength=n_refs)
+
+        # Range of index entries equal to each sample hash
+        lo = np.searchsorted(index, sample_hashes, side='left')
+        hi = np.searchsorted(index, sample_hashes, side='right')
+        sizes = hi - lo
+        hit = sizes > 0
+        lo, sizes = lo[hit], sizes[hit]
+
+        # Expand the ranges into index positions without a Python loop
+        offsets = np.repeat(lo - (np.cumsum(sizes) - sizes), sizes)
+        positions = offsets + np.arange(sizes.sum())
+
+        return np.bincount(ids[positions], minlength=n_refs)
+
+    return count
+
+
+def _sketch_batch(task):
+    """
+    Sketch one batch of sequences in a worker process.
+
+    Args:
+        task: Tuple of (ksize, scaled, sequences)
+
+    Returns:
+        MinHash: Sketch of the batch, merged by the caller
+    """
+    ksize, scaled, sequences = task
+
+    sketch = sourmash.MinHash(n=0, ksize=ksize, scaled=scaled)
+    add = sketch.add_sequence
+    for seq in sequences:
+        add(seq, True)
+    return sketch
+
+
+class _PrefetchReader(io.RawIOBase):
+    """
+    Read-only stream that fetches from another stream on a background thread.
+
+    Network reads happen on the producer thread while the consumer
+    decompresses and sketches, so fetch stalls and CPU work overlap.
+    """
+
+    def __init__(self, raw, chunk_size=READ_CHUNK_SIZE, depth=8):
+        """
+        Start prefetching from a stream.
+
+        Args:
+            raw: Binary file-like object to read from (e.g. response.raw)
+            chunk_size: Number of bytes per background read
+            depth: Maximum number of chunks buffered ahead of the consumer
+        """
+        super().__init__()
+        self._raw = raw
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._buf = memoryview(b'')
+        self._eof = False
+
+        self._thread = threading.Thread(target=self._fetch, daemon=True)
+        self._thread.start()
+
+    def _fetch(self):
+        """Producer loop: read chunks until EOF, error or close()."""
+        try:
+            while not self._stop.is_set():
+                chunk = self._raw.read(self._chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except Exception as e:
+            # Re-raised in the consumer thread by readinto()
+            self._put(e)
+
+    def _put(self, item):
+        """Enqueue an item, giving up if the reader has been closed."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self._buf) == 0:
+            if self._eof:
+                return 0
+
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._buf = memoryview(item)
+
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self):
+        self._stop.set()
+        super().close()
+
 
 class CompositionAgent:
     """Agent for detecting organism composition in FASTQ files."""
 
-    def __init__(self, ref_dir="references/", ksize=31, scaled=1000):
+    def __init__(self, ref_dir="references/", ksize=31, scaled=1000,
+                 threads=1, lookup_table=False):
         """
         Initialize the composition agent.
 
@@ -32,10 +406,22 @@ class CompositionAgent:
             ref_dir: Directory containing reference .sig files
             ksize: K-mer size for sketching (default: 31)
             scaled: Scaling factor for MinHash (default: 1000)
+            threads: Number of worker processes for sketching (default: 1)
+            lookup_table: Build a hash table of the references (needs
+                numba); slower to build than the sorted index but faster
+                to count against, so worth it when many samples share
+                the agent, as with --server (default: False)
         """
         self.ref_dir = Path(ref_dir)
         self.ksize = ksize
         self.scaled = scaled
+        self.threads = threads
+        self.lookup_table = lookup_table
+        # Largest hash kept at this scaled
+        self._max_hash = sourmash.MinHash(
+            n=0, ksize=ksize, scaled=scaled
+        )._max_hash
+        # Reference name -> sorted uint64 array of its hashes
         self.refs = {}
 
         if not self.ref_dir.exists():
@@ -58,25 +444,209 @@ class CompositionAgent:
 
         print(f"Loading references from {self.ref_dir}...", file=sys.stderr)
 
-        for sig_path in sig_files:
+        cache_path = self._cache_path(sig_files)
+        if cache_path.exists():
             try:
-                # Load signature with matching ksize
-                sig = sourmash.load_one_signature(sig_path, ksize=self.ksize)
+                self._load_cache(cache_path)
+            except Exception as e:
+                print(f"  Warning: Could not read cache {cache_path.name}: {e}",
+                      file=sys.stderr)
+                self.refs = {}
+
+        if not self.refs:
+            self._parse_references(sig_files)
+            if self.refs:
+                self._save_cache(cache_path)
+
+        if not self.refs:
+            raise ValueError("No valid reference signatures could be loaded")
 
+        self._build_index()
+
+        print(f"Agent ready with {len(self.refs)} reference(s)\n",
+              file=sys.stderr)
+
+    def _build_index(self):
+        """
+        Merge all reference hashes into one lookup structure.
+
+        By default this is one sorted index, each entry tagged with the
+        position (in self.refs order) of the reference it came from. With
+        lookup_table, numba and at most 64 references, it is instead a
+        hash table mapping each reference hash to a bitmask of the
+        references that contain it: several times slower to build and
+        larger, but cheaper per sample. Either way a single pass of the
+        sample counts shared hashes for every reference at once.
+
+        The reference set is fixed for the agent's lifetime, so the
+        choice of structure is made once here: self._count_common is
+        bound to a counter specialized for it, taking a sorted uint64
+        array of sample hashes and returning the shared hash count per
+        reference, in self.refs order.
+        """
+        ref_hashes = list(self.refs.values())
+        hashes = np.concatenate(ref_hashes)
+        ids = np.repeat(
+            np.arange(len(ref_hashes)),
+            [h.size for h in ref_hashes]
+        )
+
+        kernels = None
+        if self.lookup_table or hashes.size >= COMPILED_MIN_REF_HASHES:
+            kernels = _load_kernels()
+
+        if (self.lookup_table and kernels is not None
+                and len(ref_hashes) <= kernels.MAX_TABLE_REFS):
+            keys, masks = kernels.build_table(hashes, ids)
+            self._count_common = _table_counter(keys, masks, len(ref_hashes))
+            return
+
+        order = np.argsort(hashes, kind='stable')
+        self._count_common = _index_counter(
+            hashes[order], ids[order], len(ref_hashes), kernels
+        )
+
+    def _parse_references(self, sig_files):
+        """
+        Parse reference signatures into sorted hash arrays.
+
+        Args:
+            sig_files: Paths to reference .sig files
+        """
+        for sig_path in sig_files:
+            try:
                 # Extract name from filename
                 name = sig_path.stem.replace('_', ' ').title()
-                self.refs[name] = sig
+                self.refs[name] = self._read_signature(sig_path)
 
                 print(f"  Loaded: {name}", file=sys.stderr)
             except Exception as e:
                 print(f"  Warning: Could not load {sig_path.name}: {e}",
                       file=sys.stderr)
 
-        if not self.refs:
-            raise ValueError("No valid reference signatures could be loaded")
+    def _read_signature(self, sig_path):
+        """
+        Read the hashes of the matching sketch from a .sig file.
 
-        print(f"Agent ready with {len(self.refs)} reference(s)\n",
-              file=sys.stderr)
+        Signature files often hold sketches for several ksizes. Rather
+        than building a sourmash signature (and MinHash) for each one,
+        the JSON is scanned for the DNA sketch with a matching ksize and
+        only its "mins" list is converted.
+
+        Args:
+            sig_path: Path to a (possibly gzipped) .sig file
+
+        Returns:
+            np.ndarray: Sorted uint64 hashes, downsampled to self.scaled
+
+        Raises:
+            ValueError: If there is no usable sketch for this ksize/scaled
+        """
+        with open(sig_path, 'rb') as f:
+            data = f.read()
+        if data[:2] == b'\x1f\x8b':
+            data = igzip.decompress(data)
+
+        records = orjson.loads(data) if orjson is not None else json.loads(data)
+        if isinstance(records, dict):
+            records = [records]
+
+        for record in records:
+            for sketch in record.get("signatures", []):
+                if (sketch.get("ksize") != self.ksize
+                        or sketch.get("molecule", "").upper() != "DNA"
+                        or sketch.get("seed", 42) != 42):
+                    continue
+
+                max_hash = sketch.get("max_hash", 0)
+                if max_hash == 0:
+                    raise ValueError("num-based sketches are not supported")
+                if max_hash < self._max_hash:
+                    raise ValueError(
+                        f"sketch is coarser than --scaled {self.scaled}"
+                    )
+
+                hashes = np.array(sketch["mins"], dtype=np.uint64)
+                if max_hash > self._max_hash:
+                    # Downsample to the sample's scaled
+                    hashes = hashes[hashes <= np.uint64(self._max_hash)]
+                hashes.sort()
+                return hashes
+
+        raise ValueError(f"no DNA sketch with ksize={self.ksize}")
+
+    def _cache_path(self, sig_files):
+        """
+        Path of the parsed-reference cache for the current settings.
+
+        The name starts with _cache_prefix(), so caches for other
+        ksize/scaled settings coexist. The digest covers the name and
+        mtime of every .sig file, so editing, adding or removing a
+        reference selects a fresh cache.
+
+        Args:
+            sig_files: Paths to reference .sig files
+
+        Returns:
+            Path: Cache file inside the reference directory
+        """
+        key = repr((
+            self.ksize,
+            self.scaled,
+            sorted((p.name, p.stat().st_mtime_ns) for p in sig_files)
+        ))
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return self.ref_dir / f"{self._cache_prefix()}{digest}.npz"
+
+    def _cache_prefix(self):
+        """File name prefix of the caches for this ksize and scaled."""
+        return f".cache_k{self.ksize}_s{self.scaled}_"
+
+    def _load_cache(self, cache_path):
+        """
+        Load reference hash arrays from a cache file.
+
+        Args:
+            cache_path: Path to a cache written by _save_cache
+        """
+        with np.load(cache_path) as data:
+            names = data["names"].tolist()
+            for i, name in enumerate(names):
+                self.refs[name] = data[f"ref{i}"]
+                print(f"  Loaded: {name} (cached)", file=sys.stderr)
+
+    def _save_cache(self, cache_path):
+        """
+        Save reference hash arrays to a cache file.
+
+        Older caches for the same ksize and scaled (built from reference
+        files that have since changed) are removed once the new one is in
+        place. Failure to write (e.g. a read-only
+        reference directory) is reported but not fatal.
+
+        Args:
+            cache_path: Path to write the cache to
+        """
+        names = list(self.refs)
+        arrays = {f"ref{i}": self.refs[name] for i, name in enumerate(names)}
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, names=np.array(names), **arrays)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"  Warning: Could not write cache {cache_path.name}: {e}",
+                  file=sys.stderr)
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        for stale in self.ref_dir.glob(f"{self._cache_prefix()}*.npz"):
+            if stale != cache_path:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
 
     def inspect_file(self, fastq_path, read_limit=50000):
         """
@@ -102,22 +672,15 @@ class CompositionAgent:
 
         # Process FASTQ file
         reads_seen = 0
-        open_func = gzip.open if fastq_path.suffix == '.gz' else open
+        open_func = igzip.open if fastq_path.suffix == '.gz' else open
 
         try:
-            with open_func(fastq_path, 'rt') as f:
-                batch = []
-                for line in f:
-                    batch.append(line.strip())
-                    if len(batch) == 4:
-                        # Extract sequence (line 2 of FASTQ record)
-                        seq = batch[1]
-                        sketch.add_sequence(seq, force=True)
-                        batch = []
-                        reads_seen += 1
-
-                        if reads_seen >= read_limit:
-                            break
+            with open_func(fastq_path, 'rb') as f:
+                # gzip file objects report the underlying file's fd
+                _advise_sequential(f.fileno())
+                reads_seen = self._add_sequences(
+                    sketch, _iter_sequence_batches(f), read_limit
+                )
         except Exception as e:
             return {"error": f"Failed to process file: {str(e)}"}
 
@@ -155,18 +718,12 @@ class CompositionAgent:
             with requests.get(url, stream=True) as r:
                 r.raise_for_status()
 
-                with gzip.open(r.raw, 'rt') as f:
-                    batch = []
-                    for line in f:
-                        batch.append(line.strip())
-                        if len(batch) == 4:
-                            seq = batch[1]
-                            sketch.add_sequence(seq, force=True)
-                            batch = []
-                            reads_seen += 1
-
-                            if reads_seen >= read_limit:
-                                break
+                # Fetch the body in the background while we decompress
+                with _PrefetchReader(r.raw) as raw, \
+                        igzip.open(raw, 'rb') as f:
+                    reads_seen = self._add_sequences(
+                        sketch, _iter_sequence_batches(f), read_limit
+                    )
         except Exception as e:
             return {"error": f"Failed to stream from URL: {str(e)}"}
 
@@ -180,6 +737,73 @@ class CompositionAgent:
             source=url
         )
 
+    def _add_sequences(self, sketch, batches, read_limit):
+        """
+        Add batches of read sequences to a sketch.
+
+        Duplicate reads are counted but only sketched once. With more
+        than one thread,
+        batches are sketched in a pool of worker processes and the
+        results merged into sketch.
+
+        Args:
+            sketch: MinHash sketch to add sequences to
+            batches: Iterable of lists of read sequences (str or bytes)
+            read_limit: Maximum number of reads to process
+
+        Returns:
+            int: Number of reads added
+        """
+        batches = _take_reads(batches, read_limit)
+
+        if self.threads > 1:
+            return self._add_sequences_parallel(sketch, batches)
+
+        reads_seen = 0
+        seen = set()
+        add = sketch.add_sequence
+
+        for batch in batches:
+            reads_seen += len(batch)
+            for seq in _drop_seen(batch, seen):
+                add(seq, True)
+
+        return reads_seen
+
+    def _add_sequences_parallel(self, sketch, batches):
+        """
+        Sketch batches in worker processes and merge the results.
+
+        MinHash sketches are mergeable, so each batch is sketched
+        independently and the order results come back in is irrelevant.
+        At most TASKS_PER_WORKER batches per worker are in flight, so
+        input is only read and decompressed as fast as it is sketched.
+
+        Args:
+            sketch: MinHash sketch to merge worker results into
+            batches: Iterable of lists of read sequences
+
+        Returns:
+            int: Number of reads added
+        """
+        reads_seen = 0
+        seen = set()
+        pending = deque()
+
+        with multiprocessing.Pool(self.threads) as pool:
+            for batch in batches:
+                reads_seen += len(batch)
+                task = (self.ksize, self.scaled, _drop_seen(batch, seen))
+                pending.append(pool.apply_async(_sketch_batch, (task,)))
+
+                if len(pending) >= TASKS_PER_WORKER * self.threads:
+                    sketch.merge(pending.popleft().get())
+
+            while pending:
+                sketch.merge(pending.popleft().get())
+
+        return reads_seen
+
     def _calculate_composition(self, sketch, reads_sampled, source):
         """
         Calculate organism composition by comparing sketch to references.
@@ -201,11 +825,14 @@ class CompositionAgent:
         composition = {}
         total_explained = 0.0
 
+        sample_hashes = _sorted_hashes(sketch)
+        sample_size = sample_hashes.size
+        counts = self._count_common(sample_hashes)
+
         # Calculate containment for each reference
-        for name, ref_sig in self.refs.items():
+        for name, common in zip(self.refs, counts.tolist()):
             # Containment: fraction of sample k-mers found in reference
-            common = sketch.count_common(ref_sig.minhash)
-            containment = common / len(sketch) if len(sketch) > 0 else 0
+            containment = common / sample_size
 
             # Filter noise (below 1% is likely sequencing error or homology)
             if containment > 0.01:
@@ -247,6 +874,160 @@ class CompositionAgent:
         return result
 
 
+def _inspect_source(agent, source, read_limit):
+    """
+    Analyze a FASTQ file path or http(s) URL.
+
+    Args:
+        agent: CompositionAgent to analyze with
+        source: Local path, or URL starting with http:// or https://
+        read_limit: Maximum number of reads to process
+
+    Returns:
+        dict: Composition analysis results, always including "source"
+    """
+    try:
+        if source.startswith(("http://", "https://")):
+            result = agent.inspect_url(source, read_limit=read_limit)
+        else:
+            result = agent.inspect_file(source, read_limit=read_limit)
+    except Exception as e:
+        result = {"error": f"Unexpected error: {str(e)}"}
+
+    result.setdefault("source", source)
+    return result
+
+
+class _CompositionHandler(socketserver.StreamRequestHandler):
+    """Answer each line (a path or URL) with one line of JSON results."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                source = line.decode().strip()
+            except UnicodeDecodeError:
+                # Answer the bad line and keep the connection usable
+                self.wfile.write(_json_line(
+                    {"error": "Request is not valid UTF-8"}
+                ))
+                continue
+            if not source:
+                continue
+
+            result = _inspect_source(
+                self.server.agent, source, self.server.read_limit
+            )
+            self.wfile.write(_json_line(result))
+
+
+class CompositionServer(socketserver.UnixStreamServer):
+    """
+    Unix socket server that keeps a CompositionAgent loaded.
+
+    References are loaded once at startup, so each request only pays
+    for sketching and comparison. Requests are served one at a time.
+    """
+
+    def __init__(self, socket_path, agent, read_limit=50000):
+        """
+        Bind the server socket.
+
+        Args:
+            socket_path: Filesystem path of the Unix socket (a stale
+                socket there is replaced)
+            agent: CompositionAgent used for every request
+            read_limit: Maximum number of reads to process per request
+
+        Raises:
+            FileExistsError: If socket_path exists and is not a socket
+        """
+        self.agent = agent
+        self.read_limit = read_limit
+        # (st_dev, st_ino) of the socket file this server bound
+        self._bound = None
+
+        try:
+            mode = os.lstat(socket_path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(
+                    f"{socket_path} exists and is not a socket"
+                )
+            os.unlink(socket_path)
+
+        super().__init__(socket_path, _CompositionHandler)
+
+    def server_bind(self):
+        super().server_bind()
+        st = os.lstat(self.server_address)
+        self._bound = (st.st_dev, st.st_ino)
+
+    def server_close(self):
+        super().server_close()
+        if self._bound is None:
+            return
+
+        # Only remove the socket we created, not whatever replaced it
+        try:
+            st = os.lstat(self.server_address)
+        except FileNotFoundError:
+            return
+        if (st.st_dev, st.st_ino) == self._bound:
+            os.unlink(self.server_address)
+
+
+def run_batch(socket_path, paths_file):
+    """
+    Send every path or URL in a file to a running server.
+
+    Results are written to stdout as one JSON object per line. Local
+    paths are made absolute first, so they are resolved against the
+    client's working directory rather than the server's.
+
+    Args:
+        socket_path: Path of the server's Unix socket
+        paths_file: Text file with one FASTQ path or URL per line
+
+    Returns:
+        int: Exit code - 1 if any source failed, 2 if any source is
+        contaminated, 0 otherwise
+    """
+    with open(paths_file) as f:
+        sources = [line.strip() for line in f if line.strip()]
+    sources = [
+        source if source.startswith(("http://", "https://"))
+        else os.path.abspath(source)
+        for source in sources
+    ]
+
+    exit_code = 0
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+
+        with sock.makefile('rwb') as stream:
+            for source in sources:
+                stream.write(source.encode() + b'\n')
+                stream.flush()
+
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("Server closed the connection")
+
+                sys.stdout.buffer.write(line)
+                sys.stdout.buffer.flush()
+
+                result = json.loads(line)
+                if "error" in result:
+                    exit_code = 1
+                elif result.get("is_contaminated") and exit_code == 0:
+                    exit_code = 2
+
+    return exit_code
+
+
 def main():
     """Main entry point for the composition detection tool."""
     parser = argparse.ArgumentParser(
@@ -265,6 +1046,13 @@ Examples:
 
   # Limit reads processed
   python fastq_composition.py sample.fastq.gz --reads 10000
+
+  # Sketch with 4 worker processes
+  python fastq_composition.py sample.fastq.gz --threads 4
+
+  # Keep references loaded in a server, then analyze many files
+  python fastq_composition.py --server --socket /tmp/composition.sock &
+  python fastq_composition.py --batch paths.txt --socket /tmp/composition.sock
         """
     )
 
@@ -306,23 +1094,76 @@ Examples:
         help='Scaling factor for MinHash (default: 1000)'
     )
 
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=1,
+        help='Number of worker processes for sketching (default: 1)'
+    )
+
+    parser.add_argument(
+        '--server',
+        action='store_true',
+        help='Serve requests on --socket, keeping references loaded'
+    )
+
+    parser.add_argument(
+        '--batch',
+        metavar='PATHS_FILE',
+        help='Send each path or URL in PATHS_FILE (one per line) to the '
+             'server on --socket; prints one JSON result per line'
+    )
+
+    parser.add_argument(
+        '--socket',
+        help='Unix socket path for --server and --batch'
+    )
+
     args = parser.parse_args()
 
     # Validate input
-    if not args.fastq and not args.url:
+    if args.server or args.batch:
+        if args.server and args.batch:
+            parser.error("Cannot specify both --server and --batch")
+        if args.fastq or args.url:
+            parser.error("--server/--batch cannot be combined with a file "
+                         "path or --url")
+        if not args.socket:
+            parser.error("--server/--batch require --socket")
+    elif not args.fastq and not args.url:
         parser.error("Either FASTQ file path or --url must be provided")
 
     if args.fastq and args.url:
         parser.error("Cannot specify both file path and --url")
 
+    if args.batch:
+        try:
+            sys.exit(run_batch(args.socket, args.batch))
+        except OSError as e:
+            _print_json({"error": f"Batch failed: {str(e)}"})
+            sys.exit(1)
+
     try:
         # Initialize agent
         agent = CompositionAgent(
             ref_dir=args.ref_dir,
             ksize=args.ksize,
-            scaled=args.scaled
+            scaled=args.scaled,
+            threads=args.threads,
+            # Many samples share the references, so a table pays off
+            lookup_table=args.server
         )
 
+        if args.server:
+            with CompositionServer(args.socket, agent,
+                                   read_limit=args.reads) as server:
+                print(f"Serving on {args.socket}", file=sys.stderr)
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+            return
+
         # Analyze composition
         if args.url:
             result = agent.inspect_url(args.url, read_limit=args.reads)
@@ -330,7 +1171,7 @@ Examples:
             result = agent.inspect_file(args.fastq, read_limit=args.reads)
 
         # Output JSON
-        print(json.dumps(result, indent=2))
+        _print_json(result)
 
         # Exit with error code if there was a problem
         if "error" in result:
@@ -341,12 +1182,11 @@ Examples:
             sys.exit(2)
 
     except FileNotFoundError as e:
-        print(json.dumps({"error": str(e)}, indent=2))
+        _print_json({"error": str(e)})
         sys.exit(1)
 
     except Exception as e:
-        print(json.dumps({"error": f"Unexpected error: {str(e)}"}, indent=2),
-              file=sys.stderr)
+        _print_json({"error": f"Unexpected error: {str(e)}"}, file=sys.stderr)
         sys.exit(1)
 
 
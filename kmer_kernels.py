@@ -0,0 +1,128 @@
+"""
+Numba-compiled kernels for FASTQ composition detection
+
+Hash-intersection kernels used when comparing a sample sketch against a
+large set of references: a branchless merge over a sorted index, and an
+open-addressing table of per-reference bitmasks. Imported optionally by
+fastq_composition; requires numba.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, boundscheck=False)
+def index_counts(sample, index, ids, n_refs):
+    """
+    Count sample hashes shared with each reference of a merged index.
+
+    A single two-pointer merge over both sorted arrays, written without
+    data-dependent branches: the pointer advances and the count update
+    are computed from the comparison results, so low-overlap inputs
+    don't pay for branch mispredictions.
+
+    Args:
+        sample: Sorted, unique uint64 sample hashes
+        index: Sorted uint64 hashes of all references (may repeat when
+            references share a hash)
+        ids: Reference position of each index entry
+        n_refs: Number of references
+
+    Returns:
+        np.ndarray: int64 shared hash count per reference
+    """
+    counts = np.zeros(n_refs, dtype=np.int64)
+    ns = sample.size
+    ni = index.size
+    i = 0
+    j = 0
+
+    while i < ns and j < ni:
+        x = sample[i]
+        y = index[j]
+        counts[ids[j]] += x == y
+        # Stay on a matching sample hash so repeated index entries match
+        i += x < y
+        j += x >= y
+
+    return counts
+
+
+# De Bruijn lookup for the index of the lowest set bit of a uint64
+_DEBRUIJN = np.uint64(0x03f79d71b4cb0a89)
+_DEBRUIJN_BITS = np.zeros(64, dtype=np.int64)
+for _i in range(64):
+    _DEBRUIJN_BITS[((int(_DEBRUIJN) << _i) & 0xffffffffffffffff) >> 58] = _i
+
+# Largest number of references a table bitmask can tag
+MAX_TABLE_REFS = 64
+
+
+@njit(cache=True, boundscheck=False)
+def build_table(hashes, ids):
+    """
+    Build an open-addressing hash table of reference hashes.
+
+    Each distinct hash maps to a uint64 bitmask of the references that
+    contain it. The hashes are already uniformly distributed, so their
+    low bits are used directly as the slot; collisions probe linearly.
+    A zero mask marks an empty slot.
+
+    Args:
+        hashes: uint64 hashes of all references (any order, may repeat)
+        ids: Reference position (< MAX_TABLE_REFS) of each hash
+
+    Returns:
+        tuple: (keys, masks) uint64 arrays of power-of-two size
+    """
+    size = 1
+    while size < 2 * hashes.size:
+        size <<= 1
+    keys = np.zeros(size, dtype=np.uint64)
+    masks = np.zeros(size, dtype=np.uint64)
+    slot_mask = np.uint64(size - 1)
+
+    for j in range(hashes.size):
+        h = hashes[j]
+        slot = h & slot_mask
+        while masks[slot] != 0 and keys[slot] != h:
+            slot = (slot + np.uint64(1)) & slot_mask
+        keys[slot] = h
+        masks[slot] |= np.uint64(1) << np.uint64(ids[j])
+
+    return keys, masks
+
+
+@njit(cache=True, boundscheck=False)
+def table_counts(sample, keys, masks, n_refs):
+    """
+    Count sample hashes shared with each reference of a hash table.
+
+    One table probe per sample hash, then one increment per set bit of
+    its mask: O(|sample|) however many references there are.
+
+    Args:
+        sample: uint64 sample hashes (unique)
+        keys: Table keys from build_table
+        masks: Table masks from build_table
+        n_refs: Number of references
+
+    Returns:
+        np.ndarray: int64 shared hash count per reference
+    """
+    counts = np.zeros(n_refs, dtype=np.int64)
+    slot_mask = np.uint64(keys.size - 1)
+
+    for h in sample:
+        slot = h & slot_mask
+        while masks[slot] != 0:
+            if keys[slot] == h:
+                m = masks[slot]
+                while m:
+                    low = m & (~m + np.uint64(1))
+                    counts[_DEBRUIJN_BITS[(low * _DEBRUIJN) >> np.uint64(58)]] += 1
+                    m &= m - np.uint64(1)
+                break
+            slot = (slot + np.uint64(1)) & slot_mask
+
+    return counts
@@ -0,0 +1,203 @@
+"""
+Tests for fastq_composition
+
+Cover the pure-Python paths that run with or without the optional
+dependencies: block-wise FASTQ parsing, index counting, reference
+signature parsing and the parsed-reference cache.
+
+Run with: python -m pytest test_fastq_composition.py
+"""
+
+import gzip
+import io
+import random
+
+import numpy as np
+import pytest
+
+sourmash = pytest.importorskip("sourmash")
+
+import fastq_composition as fc  # noqa: E402
+
+
+def _line_by_line(data):
+    """Sequences of the complete records, parsed one line at a time."""
+    sequences = []
+    record = []
+    for line in io.TextIOWrapper(io.BytesIO(data), encoding='ascii'):
+        record.append(line.strip())
+        if len(record) == 4:
+            sequences.append(record[1].encode())
+            record = []
+    return sequences
+
+
+def _block_reader(data, chunk_size):
+    f = io.BytesIO(data)
+    return [
+        seq
+        for batch in fc._iter_sequence_batches(f, chunk_size)
+        for seq in batch
+    ]
+
+
+def _fastq(sequences, newline="\n"):
+    return "".join(
+        f"@r{i}{newline}{seq}{newline}+{newline}{'I' * len(seq)}{newline}"
+        for i, seq in enumerate(sequences)
+    ).encode()
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64, 1 << 20])
+def test_sequence_batches_across_blocks(newline, chunk_size):
+    """Records split across blocks, including mid-CRLF, parse whole."""
+    sequences = ["ACGT", "", "GATTACA", "N" * 40, "acgtn"]
+    data = _fastq(sequences, newline)
+
+    got = _block_reader(data, chunk_size)
+    assert got == [seq.encode() for seq in sequences]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_sequence_batches_missing_final_newline(newline):
+    """A final quality line without a newline still completes a read."""
+    data = _fastq(["ACGT", "GGCC"], newline)[:-len(newline)]
+
+    for chunk_size in (1, 3, 1 << 20):
+        assert _block_reader(data, chunk_size) == [b"ACGT", b"GGCC"]
+
+
+@pytest.mark.parametrize("tail", [
+    b"@r2\n",
+    b"@r2\nACG",
+    b"@r2\nACGT\n",
+    b"@r2\nACGT\n+\n",
+])
+def test_sequence_batches_drop_partial_record(tail):
+    """A trailing incomplete record is not a read."""
+    data = _fastq(["ACGT", "GGCC"]) + tail
+
+    for chunk_size in (1, 3, 1 << 20):
+        assert _block_reader(data, chunk_size) == [b"ACGT", b"GGCC"]
+
+
+def test_sequence_batches_not_fastq():
+    """Input without a full 4-line record yields no reads."""
+    for data in (b"", b"hello\nworld\n", b">a\nACGT\n"):
+        assert _block_reader(data, 1 << 20) == []
+
+
+def test_sequence_batches_match_line_by_line():
+    """Truncated LF and CRLF files parse like the line-by-line loop."""
+    rng = random.Random(0)
+
+    for _ in range(300):
+        newline = rng.choice(["\n", "\r\n"])
+        sequences = [
+            "".join(rng.choice("ACGTN") for _ in range(rng.randint(0, 9)))
+            for _ in range(rng.randint(0, 6))
+        ]
+        data = _fastq(sequences, newline)
+        data = data[:rng.randint(0, len(data))]
+        if data.endswith(b"\r"):
+            data = data[:-1]
+
+        chunk_size = rng.choice([1, 2, 3, 5, 64])
+        assert _block_reader(data, chunk_size) == _line_by_line(data)
+
+
+@pytest.mark.parametrize("sample_size", [20, 2000])
+def test_index_counter_matches_intersection(sample_size):
+    """Both search directions count like np.intersect1d."""
+    rng = np.random.default_rng(sample_size)
+    pool = rng.integers(0, 2**64, size=5000, dtype=np.uint64)
+    pool[:2] = [0, 2**64 - 1]
+    # Overlapping references, so the index repeats hashes
+    refs = [np.unique(rng.choice(pool, size=n)) for n in (400, 150, 30, 0)]
+    refs[1] = np.union1d(refs[1], refs[2])
+
+    hashes = np.concatenate(refs)
+    ids = np.repeat(np.arange(len(refs)), [r.size for r in refs])
+    order = np.argsort(hashes, kind='stable')
+    count = fc._index_counter(hashes[order], ids[order], len(refs))
+
+    sample = np.unique(np.concatenate([
+        rng.choice(pool, size=sample_size),
+        rng.integers(0, 2**64, size=10, dtype=np.uint64),
+    ]))
+    expected = [np.intersect1d(sample, r).size for r in refs]
+    assert count(sample).tolist() == expected
+
+
+def _write_signature(path, ksize, scaled, seq, compress=False):
+    """Sketch seq and save it as a .sig file; return the MinHash."""
+    mh = sourmash.MinHash(n=0, ksize=ksize, scaled=scaled)
+    mh.add_sequence(seq)
+    data = sourmash.save_signatures_to_json(
+        [sourmash.SourmashSignature(mh, name=path.stem)]
+    )
+    path.write_bytes(gzip.compress(data) if compress else data)
+    return mh
+
+
+def _random_genome(seed, length=50000):
+    rng = random.Random(seed)
+    return "".join(rng.choice("ACGT") for _ in range(length))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_signature_downsamples(tmp_path, compress):
+    """A finer sketch is downsampled to the agent's scaled."""
+    mh = _write_signature(
+        tmp_path / "ecoli.sig", 31, 10, _random_genome(1), compress
+    )
+
+    agent = fc.CompositionAgent(tmp_path, ksize=31, scaled=100)
+    expected = sorted(mh.downsample(scaled=100).hashes)
+    assert agent.refs["Ecoli"].tolist() == expected
+
+
+def test_read_signature_rejects_coarser(tmp_path):
+    """A sketch coarser than --scaled cannot be used."""
+    _write_signature(tmp_path / "ecoli.sig", 31, 1000, _random_genome(1))
+
+    with pytest.raises(ValueError):
+        fc.CompositionAgent(tmp_path, ksize=31, scaled=100)
+
+
+def test_cache_round_trip(tmp_path, capsys):
+    """A second agent loads the same references from the cache."""
+    _write_signature(tmp_path / "ecoli.sig", 31, 100, _random_genome(1))
+    _write_signature(tmp_path / "phix.sig", 31, 100, _random_genome(2, 5000))
+
+    first = fc.CompositionAgent(tmp_path, ksize=31, scaled=100)
+    capsys.readouterr()
+    second = fc.CompositionAgent(tmp_path, ksize=31, scaled=100)
+
+    assert "(cached)" in capsys.readouterr().err
+    assert list(second.refs) == list(first.refs)
+    for name, hashes in first.refs.items():
+        assert second.refs[name].dtype == np.uint64
+        assert np.array_equal(second.refs[name], hashes)
+
+
+def test_cache_prunes_only_same_settings(tmp_path):
+    """A new cache replaces stale ones for its settings only."""
+    _write_signature(tmp_path / "ecoli.sig", 31, 100, _random_genome(1))
+    fc.CompositionAgent(tmp_path, ksize=31, scaled=100)
+    fc.CompositionAgent(tmp_path, ksize=31, scaled=200)
+
+    stale = tmp_path / ".cache_k31_s100_0000000000000000.npz"
+    stale.write_bytes(b"")
+
+    # Adding a reference selects a new cache for k31/s100, replacing the
+    # old (and stale) ones but not the s200 cache
+    _write_signature(tmp_path / "phix.sig", 31, 100, _random_genome(2, 5000))
+    fc.CompositionAgent(tmp_path, ksize=31, scaled=100)
+
+    caches = sorted(p.name for p in tmp_path.glob(".cache_*.npz"))
+    assert not stale.exists()
+    assert [name[:16] for name in caches] == [
+        ".cache_k31_s100_", ".cache_k31_s200_"
+    ]
@@ -0,0 +1,37 @@
+"""
+Tests for the Numba hash-intersection kernels
+
+index_counts and table_counts are checked against a plain set
+intersection.
+
+Run with: python -m pytest test_kmer_kernels.py
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+import kmer_kernels  # noqa: E402
+
+
+def test_counts_match_intersection():
+    """index_counts and table_counts agree with set intersection."""
+    rng = np.random.default_rng(0)
+    pool = rng.integers(0, 2**64, size=5000, dtype=np.uint64)
+    refs = [np.unique(rng.choice(pool, size=n)) for n in (3000, 800, 50)]
+    sample = np.unique(rng.choice(pool, size=2000))
+
+    hashes = np.concatenate(refs)
+    ids = np.repeat(np.arange(len(refs)), [r.size for r in refs])
+    expected = [np.intersect1d(sample, r).size for r in refs]
+
+    order = np.argsort(hashes, kind="stable")
+    counts = kmer_kernels.index_counts(
+        sample, hashes[order], ids[order], len(refs)
+    )
+    assert counts.tolist() == expected
+
+    keys, masks = kmer_kernels.build_table(hashes, ids)
+    counts = kmer_kernels.table_counts(sample, keys, masks, len(refs))
+    assert counts.tolist() == expected